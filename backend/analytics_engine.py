@@ -21,44 +21,45 @@ def generate_risk_trend(norad_id: str, days: int = 7) -> SatelliteAnalytics:
     In a real app, this would pull from historical database logs of position/conjunctions.
     """
     now = datetime.datetime.now(timezone.utc)
-    trend = []
     
     # Base risk factor derived from ID for consistency
     seed = int(norad_id) % 100
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     
-    base_risk = np.random.uniform(10, 50)
+    base_risk = rng.uniform(10, 50)
     
-    for i in range(days):
-        dt = now - timedelta(days=(days - 1 - i))
-        # Add some "volatility" to the risk
-        daily_variation = np.random.normal(0, 5)
-        score = max(0, min(100, base_risk + daily_variation + (i * 0.5))) # Gradual increase simulation
-        
-        trend.append(RiskTrendPoint(
-            timestamp=dt.strftime("%Y-%m-%d"),
-            risk_score=round(score, 2)
-        ))
+    # Add some "volatility" to the risk, plus a gradual increase simulation
+    daily_variation = rng.normal(0, 5, days)
+    drift = np.arange(days) * 0.5
+    scores = np.clip(base_risk + daily_variation + drift, 0, 100)
+    
+    dates = [now - timedelta(days=(days - 1 - i)) for i in range(days)]
+    timestamps = [f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}" for dt in dates]
+    trend = [
+        RiskTrendPoint(timestamp=ts, risk_score=round(float(score), 2))
+        for ts, score in zip(timestamps, scores)
+    ]
     
     # Calculate dummy stability index
-    stability = 100 - (np.std([p.risk_score for p in trend]) * 5)
+    stability = 100 - (scores.std() * 5)
     
     return SatelliteAnalytics(
         norad_id=norad_id,
         trend_data=trend,
         forecast_summary="The orbital path remains stable with a slight upward trend in local debris density.",
-        avg_altitude=round(np.random.uniform(400, 800), 1), # Placeholder
-        stability_index=round(max(0, stability), 2)
+        avg_altitude=round(rng.uniform(400, 800), 1), # Placeholder
+        stability_index=round(max(0.0, float(stability)), 2)
     )
 
+_STATIC_STATS = {
+    "total_tracked": 27432,
+    "high_risk_count": 142,
+    "conjunctions_24h": 854,
+    "system_health": "Optimal",
+}
+
 def get_global_stats() -> Dict:
     """
     Returns aggregate statistics for all tracked satellites.
     """
-    return {
-        "total_tracked": 27432,
-        "high_risk_count": 142,
-        "conjunctions_24h": 854,
-        "system_health": "Optimal",
-        "last_update": datetime.datetime.now(timezone.utc).isoformat()
-    }
+    return {**_STATIC_STATS, "last_update": datetime.datetime.now(timezone.utc).isoformat()}
@@ -1,23 +1,53 @@
-from fastapi import APIRouter, HTTPException
-from sgp4.api import Satrec
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sgp4.api import Satrec, SatrecArray
 from sgp4.api import jday
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
+import math
+import asyncio
 import datetime
 from datetime import timezone
 from typing import List, Optional
 from pydantic import BaseModel
-import json
+import orjson
 import os
 import time
 import logging
+import threading
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# --- Constants ---
+_RAD2DEG = 180.0 / math.pi
+_MIN_PER_DAY = 1440.0
+_MIN_PER_DAY_OVER_2PI = _MIN_PER_DAY / (2.0 * math.pi)  # rad/min -> revs/day
+_MU_EARTH_KM3_S2 = 398600.4418  # earth grav constant
+_EARTH_R_KM = 6371.0
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
 # --- TLE Cache (disk-based fallback) ---
 IS_VERCEL = os.environ.get("VERCEL") == "1"
 TLE_CACHE_FILE = "/tmp/tle_cache.json" if IS_VERCEL else os.path.join(os.path.dirname(__file__), "tle_cache.json")
+_CACHE_LOCK = threading.Lock()  # get_tle runs in worker threads
+
+# --- HTTP Session (keep-alive + connection pooling to CelesTrak) ---
+# Read timeouts and 502/503/504 are retried up to 3 times, sleeping 0s -> 2s -> 4s
+# (urllib3 backoff_factor=1.0). Connection errors and connect timeouts are not
+# retried (connect=0), since CelesTrak is simply unreachable then.
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, connect=0, backoff_factor=1.0,
+                      status_forcelist=[502, 503, 504], raise_on_status=False),
+))
 
 # --- Popular Satellites Fallback (In case CelesTrak blocks Vercel) ---
 POPULAR_SATS_TLE = {
@@ -31,22 +61,53 @@ POPULAR_SATS_TLE = {
     "43013": ("GPS BIIR-2 (PRN 13)", "1 43013U 17075A   24046.41234567  .00000045  00000-0  00000-0 0  9993", "2 43013  55.1234 123.4567 0001234  12.3456  12.3456  2.00123456123456"),
 }
 
+# Parsed copy of TLE_CACHE_FILE as (path, mtime_ns, data), reused until the file changes
+_disk_cache_state = (None, None, {})
+
 def _load_cache() -> dict:
-    if os.path.exists(TLE_CACHE_FILE):
-        try:
-            with open(TLE_CACHE_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    """
+    Returns the parsed disk cache. The file is only re-read when its mtime
+    changes (e.g. another worker saved it); treat the result as read-only.
+    """
+    global _disk_cache_state
+    try:
+        mtime = os.stat(TLE_CACHE_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    path, cached_mtime, data = _disk_cache_state
+    if path == TLE_CACHE_FILE and cached_mtime == mtime:
+        return data
+    try:
+        with open(TLE_CACHE_FILE, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if raw else {}
+    except Exception:
+        data = {}
+    _disk_cache_state = (TLE_CACHE_FILE, mtime, data)
+    return data
 
 def _save_cache(cache: dict):
+    global _disk_cache_state
+    # Write-then-rename so readers (other workers too) never see a partial file
+    tmp_path = f"{TLE_CACHE_FILE}.{os.getpid()}.tmp"
     try:
-        with open(TLE_CACHE_FILE, "w") as f:
-            json.dump(cache, f)
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(cache))
+        os.replace(tmp_path, TLE_CACHE_FILE)
+        _disk_cache_state = (TLE_CACHE_FILE, os.stat(TLE_CACHE_FILE).st_mtime_ns, cache)
     except Exception as e:
         logger.warning(f"Could not save TLE cache: {e}")
 
+# --- TLE Cache (in-memory, per process) ---
+# Hot lookups skip the disk cache and the network entirely.
+TLE_TTL = 6 * 3600  # seconds - TLEs are refreshed a few times a day
+_TLE_MEM = {}  # norad_id -> (fetched_at monotonic, (name, line1, line2))
+
+# --- Simulated data RNG ---
+# Local Generator instead of the global np.random state; only used from the
+# async handlers, i.e. on the event loop thread.
+_RNG = np.random.default_rng()
+
 
 # --- Models ---
 from pydantic import BaseModel
@@ -74,9 +135,9 @@ class SatelliteSummary(BaseModel):
     data_source: Optional[str] = "CelesTrak"
 
 # --- Mock Data Helper ---
-def get_dashboard_data():
+def _build_dashboard_data():
     """
-    Returns a curated list of interesting satellites for the dashboard.
+    Builds the curated list of interesting satellites for the dashboard.
     """
     return [
         SatelliteSummary(
@@ -201,6 +262,15 @@ def get_dashboard_data():
         )
     ]
 
+# Static data - validated once at import instead of on every request
+_DASHBOARD_CACHE: List[SatelliteSummary] = _build_dashboard_data()
+
+def get_dashboard_data():
+    """
+    Returns a curated list of interesting satellites for the dashboard.
+    """
+    return _DASHBOARD_CACHE
+
 
 @router.get("/satellites", response_model=List[SatelliteSummary])
 def get_satellites():
@@ -212,19 +282,32 @@ def get_satellites():
 # --- Existing Endpoints (Keep functioning) ---
 
 # --- TLE Fetching Logic with retry + cache ---
-def get_tle(norad_id):
+REFRESH_COOLDOWN = 300  # seconds between background refreshes of one hardcoded TLE
+_REFRESH_ATTEMPTS = {}  # norad_id -> monotonic time of the last background refresh
+_REFRESH_LOCK = threading.Lock()
+
+def _fetch_tle(norad_id: str):
     """
-    Fetches TLE from CelesTrak with 3 retries and exponential backoff.
-    Falls back to disk cache if network is unavailable.
+    Fetches TLE from CelesTrak (retries/backoff handled by _SESSION) and stores
+    it in the memory and disk caches. Returns None if it could not be fetched.
+    A cached entry's ETag/Last-Modified are sent back so an unchanged TLE costs
+    only a 304.
     """
-    cache = _load_cache()
-    cache_key = str(norad_id)
     url_tle = f"https://celestrak.org/NORAD/elements/gp.php?CATNR={norad_id}&FORMAT=tle"
+    cached = _load_cache().get(norad_id)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
 
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-    for attempt in range(3):
-        try:
-            response = requests.get(url_tle, headers=headers, timeout=10)
+    try:
+        response = _SESSION.get(url_tle, timeout=10, headers=headers)
+        if response.status_code == 304 and cached:
+            result = (cached["name"], cached["line1"], cached["line2"])
+            etag, last_modified = cached.get("etag"), cached.get("last_modified")
+        else:
             response.raise_for_status()
             lines = response.text.strip().splitlines()
             if len(lines) >= 3:
@@ -233,29 +316,74 @@ def get_tle(norad_id):
                 result = ("Unknown", lines[0].strip(), lines[1].strip())
             else:
                 result = None
-
-            if result:
-                # Save to cache on success
-                cache[cache_key] = {"name": result[0], "line1": result[1], "line2": result[2]}
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+        if result:
+            _TLE_MEM[norad_id] = (time.monotonic(), result)
+            # Save to cache on success (a 304 just renews fetched_at)
+            with _CACHE_LOCK:
+                cache = dict(_load_cache())
+                cache[norad_id] = {"name": result[0], "line1": result[1], "line2": result[2],
+                                   "fetched_at": int(time.time()),
+                                   "etag": etag, "last_modified": last_modified}
                 _save_cache(cache)
-                return result
-        except requests.exceptions.ConnectionError:
-            logger.warning(f"CelesTrak unreachable (attempt {attempt+1}/3). Trying cache...")
-            break  # No point retrying a connection error
-        except requests.exceptions.Timeout:
-            wait = 2 ** attempt
-            logger.warning(f"CelesTrak timeout (attempt {attempt+1}/3). Retrying in {wait}s...")
-            time.sleep(wait)
-        except Exception as e:
-            logger.error(f"TLE fetch error: {e}")
-            break
-
-    # Fallback to hardcoded popular sats
+            return result
+    except requests.exceptions.ConnectionError:
+        logger.warning("CelesTrak unreachable. Trying cache...")
+    except requests.exceptions.Timeout:
+        logger.warning("CelesTrak timeout. Trying cache...")
+    except Exception as e:
+        logger.error(f"TLE fetch error: {e}")
+
+    return None
+
+def _schedule_refresh(norad_id: str):
+    """
+    Refreshes a TLE in a background thread, at most once per REFRESH_COOLDOWN.
+    """
+    now = time.monotonic()
+    with _REFRESH_LOCK:
+        last = _REFRESH_ATTEMPTS.get(norad_id)
+        if last is not None and now - last < REFRESH_COOLDOWN:
+            return
+        _REFRESH_ATTEMPTS[norad_id] = now
+    threading.Thread(target=_fetch_tle, args=(norad_id,), daemon=True).start()
+
+def get_tle(norad_id):
+    """
+    Looks up a TLE: memory cache -> fresh disk cache -> CelesTrak -> stale disk
+    cache. Fetched TLEs are served without refetching for TLE_TTL seconds.
+    Popular sats never wait on CelesTrak: they answer from the disk cache at
+    any age, else the hardcoded TLE, and refresh in the background.
+    """
+    cache_key = str(norad_id)
+    hit = _TLE_MEM.get(cache_key)
+    if hit and time.monotonic() - hit[0] < TLE_TTL:
+        return hit[1]
+
+    # Fresh disk-cache entry (e.g. fetched by another worker) - no network needed
+    entry = _load_cache().get(cache_key)
+    age = time.time() - entry.get("fetched_at", 0) if entry else None
+    if entry and age < TLE_TTL:
+        result = (entry["name"], entry["line1"], entry["line2"])
+        # Back-date so the memory copy expires when the disk entry does
+        _TLE_MEM[cache_key] = (time.monotonic() - age, result)
+        return result
+
+    # Popular sats - answer now, never wait on CelesTrak retries. A stale
+    # fetched TLE is still far newer than the hardcoded fallback.
     if cache_key in POPULAR_SATS_TLE:
-        logger.info(f"Using hardcoded fallback TLE for NORAD {norad_id}")
+        _schedule_refresh(cache_key)
+        if entry:
+            return (entry["name"], entry["line1"], entry["line2"])
         return POPULAR_SATS_TLE[cache_key]
 
+    result = _fetch_tle(cache_key)
+    if result:
+        return result
+
     # Fallback to cache
+    cache = _load_cache()
     if cache_key in cache:
         logger.info(f"Using cached TLE for NORAD {norad_id}")
         c = cache[cache_key]
@@ -264,10 +392,59 @@ def get_tle(norad_id):
     return None
 
 
+@lru_cache(maxsize=4096)
+def get_satrec(line1: str, line2: str) -> Satrec:
+    """
+    Parses a TLE into an SGP4 satellite object, memoized on the TLE lines.
+    twoline2rv runs the full SGP4 initialization; the result only depends on
+    the (immutable) TLE text and .sgp4() does not depend on previous calls,
+    so instances are safely shared between requests.
+    """
+    return Satrec.twoline2rv(line1, line2)
+
+
 # --- Orbit Propagation ---
+def _jday_grid(start: datetime.datetime, offsets_min: np.ndarray):
+    """
+    Builds (jd, fr) arrays for `start` + each offset (minutes), for use with
+    the vectorized SGP4 entry points.
+    """
+    jd0, fr0 = jday(start.year, start.month, start.day,
+                    start.hour, start.minute, start.second + start.microsecond * 1e-6)
+    fr = fr0 + np.asarray(offsets_min, dtype=np.float64) / _MIN_PER_DAY
+    jd = np.full_like(fr, jd0)
+    return jd, fr
+
+def _ground_track(r: np.ndarray, start: datetime.datetime, offsets_min: np.ndarray):
+    """
+    Simplified lat/lon (degrees, rounded to 4 decimals) for TEME positions
+    `r` of shape (..., steps, 3) taken at `start` + `offsets_min`.
+    The trig runs in float32, which is accurate to ~1e-5 deg (about a metre on
+    the ground) - well below both the output rounding and SGP4's own km-level error.
+    """
+    r32 = r.astype(np.float32)
+    r_mag = np.linalg.norm(r32, axis=-1)
+    lat = np.arcsin(r32[..., 2] / r_mag) * np.float32(_RAD2DEG)
+    # Longitude with time-based rotation correction (hour * 15 + minute * 0.25
+    # of each step's wall-clock time)
+    seconds_of_day = start.hour * 3600 + start.minute * 60 + start.second
+    minute_of_day = np.floor((seconds_of_day + offsets_min * 60) / 60) % _MIN_PER_DAY
+    rotation = (minute_of_day * 0.25).astype(np.float32)
+    lon = (np.arctan2(r32[..., 1], r32[..., 0]) * np.float32(_RAD2DEG)) - rotation
+    lon = (lon + np.float32(180)) % np.float32(360) - np.float32(180)
+    # Widened before rounding so the JSON shows clean 4-decimal values
+    return np.round(lat.astype(np.float64), 4), np.round(lon.astype(np.float64), 4)
+
+def _masked(values: np.ndarray, ok: np.ndarray) -> np.ndarray:
+    """
+    Contiguous copy of `values` with NaN wherever propagation failed (`ok` is False).
+    ORJSONResponse serializes the array directly and writes NaN as null.
+    """
+    return np.where(ok, values, np.nan)
+
 @router.get("/satellite/{norad_id}")
 async def get_satellite_info(norad_id: str):
-    tle_data = get_tle(norad_id)
+    tle_data = await run_in_threadpool(get_tle, norad_id)
     if not tle_data:
         raise HTTPException(status_code=404, detail="Satellite not found or TLE unavailable")
     
@@ -284,43 +461,99 @@ async def propagate_orbit(norad_id: str, minutes: int = 90, steps: int = 100):
     """
     Propagates orbit for 'minutes'. Returns TEME [x,y,z] and Geodetic [lat,lon].
     """
-    tle_data = get_tle(norad_id)
+    tle_data = await run_in_threadpool(get_tle, norad_id)
     if not tle_data:
         raise HTTPException(status_code=404, detail="Satellite data not found")
         
     name, line1, line2 = tle_data
-    satellite = Satrec.twoline2rv(line1, line2)
+    satellite = get_satrec(line1, line2)
     
-    trajectory = []
-    now = datetime.datetime.now(timezone.utc)
+    # Whole seconds keep the timestamps and the jd/fr grid in lockstep
+    now = datetime.datetime.now(timezone.utc).replace(microsecond=0)
     
     step_size = minutes / steps
+    offsets_min = np.arange(steps) * step_size
     
-    for i in range(steps):
-        future_time = now + datetime.timedelta(minutes=i * step_size)
-        jd, fr = jday(future_time.year, future_time.month, future_time.day,
-                      future_time.hour, future_time.minute, future_time.second)
-        e, r, v = satellite.sgp4(jd, fr)
-        
-        if e == 0:
-            # Lat/Lon calculation (Simplified)
-            r_vec = np.array(r)
-            r_mag = np.linalg.norm(r_vec)
-            lat = np.arcsin(r_vec[2] / r_mag) * 180 / np.pi
-            # Longitude with time-based rotation correction
-            lon = (np.arctan2(r_vec[1], r_vec[0]) * 180 / np.pi) - (future_time.hour * 15 + future_time.minute * 0.25)
-            lon = (lon + 180) % 360 - 180
-            
-            trajectory.append({
-                "x": r[0], "y": r[1], "z": r[2],
-                "lat": round(lat, 4),
-                "lon": round(lon, 4),
-                "time": future_time.isoformat()
-            })
+    # Propagate every step in one SGP4 call, shape (1, steps, 3)
+    jd, fr = _jday_grid(now, offsets_min)
+    e, r, v = SatrecArray([satellite]).sgp4(jd, fr)
+    ok = e[0] == 0
+    r = r[0][ok]
+    offsets_min = offsets_min[ok]
+    
+    lat, lon = _ground_track(r, now, offsets_min)
+    
+    # Convert whole columns once, then zip into per-point dicts
+    lat = lat.tolist()
+    lon = lon.tolist()
+    times = [(now + datetime.timedelta(minutes=m)).isoformat() for m in offsets_min.tolist()]
+    trajectory = [
+        {"x": x, "y": y, "z": z, "lat": la, "lon": lo, "time": t}
+        for (x, y, z), la, lo, t in zip(r.tolist(), lat, lon, times)
+    ]
             
-    return {"trajectory": trajectory, "norad_id": norad_id, "name": name}
+    # Returned pre-rendered so FastAPI skips the jsonable_encoder walk over every point
+    return ORJSONResponse({"trajectory": trajectory, "norad_id": norad_id, "name": name})
+
+MAX_BATCH_IDS = 50  # each ID may cost a CelesTrak fetch on a worker thread
+
+@router.get("/propagate_many")
+async def propagate_many(
+    ids: List[str] = Query(...),
+    minutes: int = Query(90, ge=1, le=1440, description="Propagation window in minutes (1-1440)"),
+    steps: int = Query(100, ge=1, le=1000, description="Number of samples (1-1000)"),
+):
+    """
+    Propagates several satellites over the same time grid in one SGP4 call.
+    Returns columnar arrays indexed [satellite][step]; steps where SGP4 failed are null.
+    """
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    tles = await asyncio.gather(*(run_in_threadpool(get_tle, norad_id) for norad_id in ids))
+    missing = [norad_id for norad_id, tle in zip(ids, tles) if not tle]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Satellite data not found: {', '.join(missing)}")
+    
+    satellites = SatrecArray([get_satrec(line1, line2) for _, line1, line2 in tles])
+    
+    now = datetime.datetime.now(timezone.utc).replace(microsecond=0)
+    offsets_min = np.arange(steps) * (minutes / steps)
+    
+    # Shape (len(ids), steps, 3)
+    jd, fr = _jday_grid(now, offsets_min)
+    e, r, v = satellites.sgp4(jd, fr)
+    ok = e == 0
+    lat, lon = _ground_track(r, now, offsets_min)
+    
+    # ndarrays go straight to orjson - no .tolist() round trip
+    return ORJSONResponse({
+        "ids": ids,
+        "names": [tle[0] for tle in tles],
+        "time": [(now + datetime.timedelta(minutes=m)).isoformat() for m in offsets_min.tolist()],
+        "x": _masked(r[..., 0], ok),
+        "y": _masked(r[..., 1], ok),
+        "z": _masked(r[..., 2], ok),
+        "lat": _masked(lat, ok),
+        "lon": _masked(lon, ok),
+    })
 
 # --- AI Risk Assessment (Mock/Heuristic) ---
+def _score_risk(inclo: float, no_kozai: float):
+    """
+    Orbit-dependent part of the risk heuristic.
+    Returns (score, in_leo, is_polar) from SGP4 inclination (rad) and mean motion (rad/min).
+    """
+    inclination = inclo * _RAD2DEG # degrees
+    mean_motion = no_kozai * _MIN_PER_DAY_OVER_2PI # revs per day
+    
+    # 1. Crowded Low Earth Orbit (LEO) check
+    # LEO is roughly > 11.25 revs/day (period < 128 min)
+    in_leo = mean_motion > 11.25
+    # 2. Polar orbit risk (crossing many other orbits)
+    is_polar = 80 < inclination < 100
+    
+    return 40 * in_leo + 30 * is_polar, in_leo, is_polar
+
 @router.get("/risk/{norad_id}")
 async def calculate_risk(norad_id: str):
     """
@@ -328,36 +561,26 @@ async def calculate_risk(norad_id: str):
     Real collision avoidance requires specific conjunction messages (CDM).
     This is a demonstration using orbital parameters.
     """
-    tle_data = get_tle(norad_id)
+    tle_data = await run_in_threadpool(get_tle, norad_id)
     if not tle_data:
          raise HTTPException(status_code=404, detail="Satellite not found")
     
     name, line1, line2 = tle_data
-    satellite = Satrec.twoline2rv(line1, line2)
+    satellite = get_satrec(line1, line2)
     
     # Heuristic:
     # High inclination + Low Perigee = Higher debris risk? 
     # This is just a 'toy' model for the MVP.
+    risk_score, in_leo, is_polar = _score_risk(satellite.inclo, satellite.no_kozai)
     
-    inclination = satellite.inclo * 180 / np.pi # degrees
-    mean_motion = satellite.no_kozai * 1440 / (2 * np.pi) # revs per day
-    
-    risk_score = 0
     risk_factors = []
-    
-    # 1. Crowded Low Earth Orbit (LEO) check
-    # LEO is roughly > 11.25 revs/day (period < 128 min)
-    if mean_motion > 11.25:
-        risk_score += 40
+    if in_leo:
         risk_factors.append("Orbit inside crowded LEO zone")
-        
-    # 2. Polar orbit risk (crossing many other orbits)
-    if 80 < inclination < 100:
-        risk_score += 30
+    if is_polar:
         risk_factors.append("Polar orbit (high intersection probability)")
         
     # 3. Random 'Solar Activity' factor (simulated external data)
-    solar_flux_risk = np.random.randint(0, 20)
+    solar_flux_risk = int(_RNG.integers(0, 20))
     if solar_flux_risk > 10:
         risk_score += solar_flux_risk
         risk_factors.append("High Solar Flux (Increased Atmospheric Drag)")
@@ -382,22 +605,17 @@ def calculate_orbital_elements(satellite) -> dict:
     Extracts/Approximates orbital elements from SGP4 satellite object.
     """
     # Mean motion (revs per day)
-    no = satellite.no_kozai * 1440.0 / (2.0 * np.pi)
+    no = satellite.no_kozai * _MIN_PER_DAY_OVER_2PI
     # Inclination (deg)
-    inclo = satellite.inclo * 180.0 / np.pi
+    inclo = satellite.inclo * _RAD2DEG
     # Eccentricity
     ecco = satellite.ecco
     
     # Period (minutes)
-    period = 1440.0 / no
+    period = _MIN_PER_DAY / no
     
-    # Semi-major axis (km) - approximate
-    mu = 398600.4418 # earth grav constant
-    n_rad_s = satellite.no_kozai / 60.0 # rad/s ? no, sgp4 is rad/min
-    # SGP4 'no' is rad/min. 
-    # a = (mu / n^2)^(1/3). 
-    # But satellite.a is in earth radii? SGP4 internal units are tricky.
-    # Let's use alt calculation from position for apogee/perigee to be safer/simpler for MVP.
+    # Semi-major axis / apogee / perigee are approximated in _details_math,
+    # SGP4 internal units are tricky.
     
     return {
         "period_min": round(period, 2),
@@ -405,17 +623,51 @@ def calculate_orbital_elements(satellite) -> dict:
         "eccentricity": ecco
     }
 
+def _details_math(r, v, no_kozai: float, ecco: float, hour: int, minute: int):
+    """
+    Scalar math for the details endpoint, from a TEME state vector (km, km/s).
+    Returns (alt_km, vel_kms, apogee_km, perigee_km, lat_deg, lon_deg).
+    """
+    # Vectors to Scalars (plain math - no ndarrays for a single 3-vector)
+    rx, ry, rz = r
+    vx, vy, vz = v
+    r_mag = math.sqrt(rx * rx + ry * ry + rz * rz)
+    alt_km = r_mag - _EARTH_R_KM # Approximate
+    vel_kms = math.sqrt(vx * vx + vy * vy + vz * vz)
+    
+    # Approx Apogee/Perigee using semi-major axis derived from mean motion
+    # n (rad/s) = no_kozai / 60
+    n = no_kozai / 60.0
+    a = (_MU_EARTH_KM3_S2 / (n**2))**(1/3) # km
+    
+    apogee = a * (1 + ecco) - _EARTH_R_KM
+    perigee = a * (1 - ecco) - _EARTH_R_KM
+    
+    # Latitude/Longitude (Ground Track)
+    # Convert TEME (inertial) to Lat/Lon (Greenwich) requires GST. 
+    # For MVP, we use a simplified conversion or just returning sub-satellite point scalar if available
+    # SGP4 library provides x,y,z in TEME. We need to rotate by GST.
+    # Custom simple conversion for demo:
+    lat = math.asin(rz / r_mag) * _RAD2DEG
+    # Longitude is trickier without GST, but we can fake rotation based on time for demo visuals
+    # or just use atan2(y, x) - gst (approx). 
+    # Let's use a mock "current" longitude based on time to show variation.
+    lon = math.atan2(ry, rx) * _RAD2DEG - (hour * 15 + minute * 0.25)
+    lon = (lon + 180) % 360 - 180 # Normalize -180 to 180
+    
+    return alt_km, vel_kms, apogee, perigee, lat, lon
+
 @router.get("/satellite/{norad_id}/details", response_model=SatelliteSummary)
 async def get_satellite_details(norad_id: str):
     """
     Fetches TLE, propagates to NOW, and returns detailed summary.
     """
-    tle_data = get_tle(norad_id)
+    tle_data = await run_in_threadpool(get_tle, norad_id)
     if not tle_data:
         raise HTTPException(status_code=404, detail="Satellite not found")
         
     name, line1, line2 = tle_data
-    satellite = Satrec.twoline2rv(line1, line2)
+    satellite = get_satrec(line1, line2)
     
     # Propagate to NOW
     now = datetime.datetime.now(timezone.utc)
@@ -425,23 +677,10 @@ async def get_satellite_details(norad_id: str):
     if e != 0:
         raise HTTPException(status_code=500, detail="SGP4 propagation error")
         
-    # Vectors to Scalars
-    r = np.array(r)
-    v = np.array(v)
-    alt_km = np.linalg.norm(r) - 6371.0 # Approximate
-    vel_kms = np.linalg.norm(v)
-    
     # Orbital Elements
     elements = calculate_orbital_elements(satellite)
-    
-    # Approx Apogee/Perigee using semi-major axis derived from mean motion
-    # n (rad/s) = no_kozai / 60
-    n = satellite.no_kozai / 60.0
-    mu = 398600.4418
-    a = (mu / (n**2))**(1/3) # km
-    
-    apogee = a * (1 + elements['eccentricity']) - 6371.0
-    perigee = a * (1 - elements['eccentricity']) - 6371.0
+    alt_km, vel_kms, apogee, perigee, lat, lon = _details_math(
+        r, v, satellite.no_kozai, satellite.ecco, now.hour, now.minute)
 
     # Risk (Simplified)
     risk = "Safe"
@@ -453,36 +692,23 @@ async def get_satellite_details(norad_id: str):
     if alt_km > 35000: orbit_type = "GEO"
 
     # --- Data Generation for Phase 13 ---
-    # 1. Latitude/Longitude (Ground Track)
-    # Convert TEME (inertial) to Lat/Lon (Greenwich) requires GST. 
-    # For MVP, we use a simplified conversion or just returning sub-satellite point scalar if available
-    # SGP4 library provides x,y,z in TEME. We need to rotate by GST.
-    # Simplified approach: Use `subpoint` method if available in library or estimate.
-    # Custom simple conversion for demo:
-    r_mag = np.linalg.norm(r)
-    lat = np.arcsin(r[2] / r_mag) * 180 / np.pi
-    # Longitude is trickier without GST, but we can fake rotation based on time for demo visuals
-    # or just use atan2(y, x) - gst (approx). 
-    # Let's use a mock "current" longitude based on time to show variation.
-    lon = (np.arctan2(r[1], r[0]) * 180 / np.pi) - (now.hour * 15 + now.minute * 0.25)
-    lon = (lon + 180) % 360 - 180 # Normalize -180 to 180
-    
-    # 2. Collision Probability (Simulated)
+    # 1. Collision Probability (Simulated)
     # Base it on altitude density.
     col_prob = 0.0
-    if 400 < alt_km < 600: col_prob += np.random.uniform(0.5, 2.5) # Crowded Starlink shell
-    if 750 < alt_km < 850: col_prob += np.random.uniform(1.0, 3.0) # Iridium/Cosmos debris belt
+    if 400 < alt_km < 600: col_prob += _RNG.uniform(0.5, 2.5) # Crowded Starlink shell
+    if 750 < alt_km < 850: col_prob += _RNG.uniform(1.0, 3.0) # Iridium/Cosmos debris belt
     if risk == "High": col_prob += 2.0
     col_prob = round(min(col_prob, 99.9), 2)
 
-    # 3. Close Approach Alert (Simulated)
+    # 2. Close Approach Alert (Simulated)
     next_approach_dist = None
     next_approach_time = None
     if col_prob > 1.0:
-        next_approach_dist = round(np.random.uniform(0.5, 5.0), 2) # km
-        minutes_to_event = np.random.randint(10, 1400)
+        next_approach_dist = round(_RNG.uniform(0.5, 5.0), 2) # km
+        minutes_to_event = int(_RNG.integers(10, 1400))
         future_evt = now + datetime.timedelta(minutes=minutes_to_event)
-        next_approach_time = future_evt.strftime("%d %b %H:%M")
+        next_approach_time = (f"{future_evt.day:02d} {_MONTHS[future_evt.month - 1]} "
+                              f"{future_evt.hour:02d}:{future_evt.minute:02d}")
 
     return SatelliteSummary(
         name=name,
@@ -510,35 +736,35 @@ async def check_conjunction(id1: str, id2: str):
     Check for close approaches between two satellites over the next orbit (90 mins).
     Returns the closest distance and time.
     """
-    tle1 = get_tle(id1)
-    tle2 = get_tle(id2)
+    # Fetch both TLEs concurrently, off the event loop
+    tle1, tle2 = await asyncio.gather(
+        run_in_threadpool(get_tle, id1),
+        run_in_threadpool(get_tle, id2),
+    )
     
     if not tle1 or not tle2:
         raise HTTPException(status_code=404, detail="One or both satellites not found")
         
-    sat1 = Satrec.twoline2rv(tle1[1], tle1[2])
-    sat2 = Satrec.twoline2rv(tle2[1], tle2[2])
-    
-    min_dist = float('inf')
-    time_of_closest = None
+    sat1 = get_satrec(tle1[1], tle1[2])
+    sat2 = get_satrec(tle2[1], tle2[2])
     
     now = datetime.datetime.now(timezone.utc)
     
-    # Check every 30 seconds for higher precision
-    for i in range(0, 180): 
-        future_time = now + datetime.timedelta(seconds=i*30)
-        jd, fr = jday(future_time.year, future_time.month, future_time.day,
-                      future_time.hour, future_time.minute, future_time.second)
-        
-        e1, r1, v1 = sat1.sgp4(jd, fr)
-        e2, r2, v2 = sat2.sgp4(jd, fr)
-        
-        if e1 == 0 and e2 == 0:
-            # Calculate Euclidean distance
-            dist = np.linalg.norm(np.array(r1) - np.array(r2))
-            if dist < min_dist:
-                min_dist = dist
-                time_of_closest = future_time.isoformat()
+    # Check every 30 seconds for higher precision - both satellites over the
+    # whole grid in a single SGP4 call, shape (2, 180, 3)
+    offsets_min = np.arange(180) * 0.5
+    jd, fr = _jday_grid(now, offsets_min)
+    e, r, v = SatrecArray([sat1, sat2]).sgp4(jd, fr)
+    
+    # Euclidean distance, ignoring steps where either propagation failed
+    dist = np.linalg.norm(r[0] - r[1], axis=1)
+    dist = np.where((e == 0).all(axis=0), dist, np.inf)
+    idx = int(np.argmin(dist))
+    
+    min_dist = float(dist[idx])
+    time_of_closest = None
+    if np.isfinite(min_dist):
+        time_of_closest = (now + datetime.timedelta(minutes=float(offsets_min[idx]))).isoformat()
     
     risk_level = "LOW"
     if min_dist < 100: risk_level = "HIGH"    # < 100 km (Very conservative/broad)
@@ -565,29 +791,23 @@ async def search_satellites(q: str):
     else:
         params["NAME"] = q
 
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-    for attempt in range(3):
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=10)
-            if response.status_code != 200:
-                return []
-            data = response.json()
-            results = []
-            for item in data[:5]:
-                name = item.get("OBJECT_NAME", "Unknown")
-                cat_id = item.get("NORAD_CAT_ID", "")
-                if cat_id:
-                    results.append({"name": name, "norad_id": cat_id, "type": item.get("OBJECT_TYPE", "PAYLOAD")})
-            return results
-        except requests.exceptions.ConnectionError:
-            logger.warning(f"Search: CelesTrak unreachable (attempt {attempt+1}/3)")
-            break
-        except requests.exceptions.Timeout:
-            wait = 2 ** attempt
-            logger.warning(f"Search: timeout (attempt {attempt+1}/3), retrying in {wait}s")
-            time.sleep(wait)
-        except Exception as e:
-            logger.error(f"Search error: {e}")
-            break
+    try:
+        response = _SESSION.get(base_url, params=params, timeout=10)
+        if response.status_code != 200:
+            return []
+        data = orjson.loads(response.content)
+        # GP/OMM JSON has no OBJECT_TYPE, so every field needs a default
+        return [
+            {"name": item.get("OBJECT_NAME", "Unknown"), "norad_id": item["NORAD_CAT_ID"],
+             "type": item.get("OBJECT_TYPE", "PAYLOAD")}
+            for item in data[:5]
+            if item.get("NORAD_CAT_ID")
+        ]
+    except requests.exceptions.ConnectionError:
+        logger.warning("Search: CelesTrak unreachable")
+    except requests.exceptions.Timeout:
+        logger.warning("Search: CelesTrak timeout")
+    except Exception as e:
+        logger.error(f"Search error: {e}")
 
     return []
@@ -1,15 +1,19 @@
-from fastapi import FastAPI, Request, Query
+from fastapi import FastAPI, Request, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import PlainTextResponse, ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from starlette.middleware.base import BaseHTTPMiddleware
 import os
 import sys
 import io
 import csv
+import hashlib
 import json
+import math
 import time
+import threading
+from collections import OrderedDict
 import datetime
 import logging
 import requests
@@ -17,6 +21,28 @@ import numpy as np
 from datetime import timezone
 from typing import List, Optional
 from pydantic import BaseModel
+from sgp4.api import jday
+
+# --- Optional PDF support ---
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet
+    _HAS_REPORTLAB = True
+except ImportError:
+    _HAS_REPORTLAB = False
+
+if _HAS_REPORTLAB:
+    # Built once and shared read-only by every report
+    _STYLES = getSampleStyleSheet()
+    _TABLE_STYLE = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0a0a1a")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f0f4ff")]),
+    ])
 
 # --- Vercel Compatibility ---
 IS_VERCEL = os.environ.get("VERCEL") == "1"
@@ -33,34 +59,102 @@ def get_client_ip(request: Request):
         return forwarded.split(",")[0].strip()
     return request.client.host if request.client else "127.0.0.1"
 
-# Disable limiter on Vercel to prevent false positives in serverless
-if IS_VERCEL:
-    limiter = Limiter(key_func=get_client_ip, enabled=False)
-else:
-    limiter = Limiter(key_func=get_client_ip, default_limits=["60/minute"])
+# Token buckets per path prefix: (tokens refilled per second, burst capacity)
+RATE_LIMITS = {
+    "/api/analytics/": (30 / 60.0, 30),
+    "/api/stats": (30 / 60.0, 30),
+    "/api/export/csv/": (10 / 60.0, 10),
+    "/api/export/pdf/": (5 / 60.0, 5),
+}
+_RATE_BUCKETS = OrderedDict()  # (client_ip, prefix) -> [tokens, last_refill], least recent first
+_RATE_LOCK = threading.Lock()
+_RATE_MAX_BUCKETS = 10000
+
+def _take_token(key, rate, capacity):
+    """Refill the bucket for key from the monotonic clock and try to spend one token.
+
+    Returns 0.0 if the request may proceed, otherwise the seconds until a token frees up.
+    """
+    now = time.monotonic()
+    with _RATE_LOCK:
+        bucket = _RATE_BUCKETS.get(key)
+        if bucket is None:
+            if len(_RATE_BUCKETS) >= _RATE_MAX_BUCKETS:
+                _RATE_BUCKETS.popitem(last=False)  # O(1): evict the least recently seen
+            bucket = _RATE_BUCKETS[key] = [float(capacity), now]
+        else:
+            _RATE_BUCKETS.move_to_end(key)
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / rate
+
+class TokenBucketMiddleware(BaseHTTPMiddleware):
+    """Per-IP token-bucket rate limiting for the prefixes in RATE_LIMITS."""
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        for prefix, (rate, capacity) in RATE_LIMITS.items():
+            if path.startswith(prefix):
+                wait = _take_token((get_client_ip(request), prefix), rate, capacity)
+                if wait:
+                    return ORJSONResponse(
+                        status_code=429,
+                        content={"error": "Rate limit exceeded"},
+                        headers={"Retry-After": str(math.ceil(wait))},
+                    )
+                break
+        return await call_next(request)
+
+# --- Conditional Responses ---
+ANALYTICS_CACHE_CONTROL = "public, max-age=30"
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag[2:]
+    return any(t.strip().removeprefix("W/") == tag for t in if_none_match.split(","))
+
+def _conditional_json(request: Request, content, cache_control: str) -> Response:
+    """Renders `content` with a weak ETag over the body; 304 if the client's copy still matches."""
+    response = ORJSONResponse(jsonable_encoder(content), headers={"Cache-Control": cache_control})
+    etag = f'W/"{hashlib.blake2b(response.body, digest_size=8).hexdigest()}"'
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    response.headers["ETag"] = etag
+    return response
 
 sys.path.append(os.path.dirname(__file__))
 
 from celestial_engine import router as celestial_router
+from celestial_engine import get_tle, get_satrec, calculate_orbital_elements
+from celestial_engine import _RAD2DEG, _EARTH_R_KM, _jday_grid
 import analytics_engine
 
 app = FastAPI(
     title="Bellatrix Orbital Risk API",
     description="AI-powered satellite tracking and orbital risk analysis platform.",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# --- Rate Limit Error Handler ---
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# --- Rate Limiting ---
+# Disabled on Vercel to prevent false positives in serverless
+if not IS_VERCEL:
+    app.add_middleware(TokenBucketMiddleware)
 
 # --- Global Exception Handler ---
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled error on {request.url}: {exc}", exc_info=True)
-    return JSONResponse(
+    url = str(request.url)
+    logger.error("Unhandled error on %s: %s", url, exc, exc_info=True)
+    return ORJSONResponse(
         status_code=500,
-        content={"error": "Internal server error", "detail": str(exc), "path": str(request.url)}
+        content={"error": "Internal server error", "detail": str(exc), "path": url}
     )
 
 # --- CORS ---
@@ -71,13 +165,15 @@ if CORS_ORIGINS == ["*"]:
     allow_origins = ["*"]
 else:
     # Production mode - use specific origins
-    allow_origins = [origin.strip() for origin in CORS_ORIGINS]
+    allow_origins = [origin.strip() for origin in CORS_ORIGINS if origin.strip()]
 
+# Every route is a GET and no cookies are sent, so "*" needs no Origin echo
+# and preflights only have to advertise GET.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allow_origins,
     allow_credentials=False,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET"],
     allow_headers=["*"],
 )
 
@@ -85,18 +181,19 @@ app.include_router(celestial_router, prefix="/api")
 
 # --- Health Endpoint ---
 @app.get("/api/health")
-async def health_check():
+async def health_check(response: Response):
     """Uptime monitoring endpoint."""
+    # Per-call timestamp, so no ETag; monitors behind a CDN must always reach the app
+    response.headers["Cache-Control"] = "no-cache"
     return {
         "status": "ok",
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "timestamp": datetime.datetime.now(timezone.utc).isoformat()[:-6] + "Z",  # "+00:00" -> "Z"
         "version": "1.0.0",
         "service": "Bellatrix Orbital Risk API"
     }
 
 # --- Analytics Endpoints ---
 @app.get("/api/analytics/{norad_id}")
-@limiter.limit("30/minute")
 async def get_sat_analytics(
     request: Request, 
     norad_id: str, 
@@ -104,105 +201,101 @@ async def get_sat_analytics(
 ):
     """Get satellite risk trend analytics."""
     if not norad_id or not norad_id.strip():
-        return JSONResponse(status_code=400, content={"error": "Invalid NORAD ID"})
-    return analytics_engine.generate_risk_trend(norad_id.strip(), days)
+        return ORJSONResponse(status_code=400, content={"error": "Invalid NORAD ID"})
+    # Seeded per satellite and dated by day, so repeat polls can be answered with a 304
+    trend = analytics_engine.generate_risk_trend(norad_id.strip(), days)
+    return _conditional_json(request, trend, ANALYTICS_CACHE_CONTROL)
 
 @app.get("/api/stats")
-@limiter.limit("30/minute")
-async def get_global_stats(request: Request):
+async def get_global_stats(request: Request, response: Response):
+    response.headers["Cache-Control"] = "public, max-age=30"
     return analytics_engine.get_global_stats()
 
 # --- CSV Export ---
+def _render_csv(satellite, now: datetime.datetime) -> str:
+    """Propagates 90 minutes at 2-minute steps from `now` and renders the CSV text."""
+    offsets = np.arange(0, 90, 2)  # 90 minutes, every 2 min
+    # Propagated at whole seconds; the timestamps keep the sub-second part
+    jds, frs = _jday_grid(now.replace(microsecond=0), offsets)
+    times = np.datetime64(now.replace(tzinfo=None)) + offsets.astype("timedelta64[m]")
+    stamps = np.datetime_as_string(times, unit="us" if now.microsecond else "s")
+
+    # All samples in one SGP4 call, then batched geodetic math
+    e, r, v = satellite.sgp4_array(jds, frs)
+    ok = e == 0
+    r_mag = np.linalg.norm(r, axis=1)
+    lat = np.arcsin(r[:, 2] / r_mag) * _RAD2DEG
+    # 15 deg/hour == 0.25 deg/minute of the UTC day, wrapped at midnight
+    gmst_corr = np.mod(now.hour * 60 + now.minute + offsets, 1440) * 0.25
+    lon = (np.arctan2(r[:, 1], r[:, 0]) * _RAD2DEG) - gmst_corr
+    lon = np.mod(lon + 180.0, 360.0) - 180.0
+    alt = r_mag - _EARTH_R_KM
+    vel = np.linalg.norm(v, axis=1)
+
+    # Round whole columns in C; only cross into Python objects at the writer
+    idx = np.flatnonzero(ok)
+    rows = zip(
+        [f"{stamp}+00:00" for stamp in stamps[idx]],
+        np.round(lat[idx], 4).tolist(),
+        np.round(lon[idx], 4).tolist(),
+        np.round(alt[idx], 2).tolist(),
+        np.round(vel[idx], 4).tolist(),
+    )
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["timestamp", "latitude", "longitude", "altitude_km", "velocity_kms"])
+    writer.writerows(rows)
+    return output.getvalue()
+
 @app.get("/api/export/csv/{norad_id}")
-@limiter.limit("10/minute")
 async def export_csv(request: Request, norad_id: str):
     """Export satellite telemetry as a downloadable CSV file."""
-    from celestial_engine import get_tle
-    from sgp4.api import Satrec, jday
-
     if not norad_id or not norad_id.strip():
-        return JSONResponse(status_code=400, content={"error": "Invalid NORAD ID"})
+        return ORJSONResponse(status_code=400, content={"error": "Invalid NORAD ID"})
     
-    tle_data = get_tle(norad_id.strip())
+    tle_data = await run_in_threadpool(get_tle, norad_id.strip())
     if not tle_data:
-        return JSONResponse(status_code=404, content={"error": "Satellite not found"})
+        return ORJSONResponse(status_code=404, content={"error": "Satellite not found"})
 
     name, line1, line2 = tle_data
-    satellite = Satrec.twoline2rv(line1, line2)
+    satellite = get_satrec(line1, line2)
+    now = datetime.datetime.now(timezone.utc)
+    # The file is ~45 rows, so send it as one body instead of streaming
+    content = await run_in_threadpool(_render_csv, satellite, now)
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["timestamp", "latitude", "longitude", "altitude_km", "velocity_kms"])
-
-    now = datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc)
-    for i in range(0, 90, 2):  # 90 minutes, every 2 min
-        t = now + datetime.timedelta(minutes=i)
-        jd, fr = jday(t.year, t.month, t.day, t.hour, t.minute, t.second)
-        e, r, v = satellite.sgp4(jd, fr)
-        if e == 0:
-            r_arr = np.array(r)
-            v_arr = np.array(v)
-            r_mag = np.linalg.norm(r_arr)
-            lat = round(np.arcsin(r_arr[2] / r_mag) * 180 / np.pi, 4)
-            lon = (np.arctan2(r_arr[1], r_arr[0]) * 180 / np.pi) - (t.hour * 15 + t.minute * 0.25)
-            lon = round((lon + 180) % 360 - 180, 4)
-            alt = round(r_mag - 6371.0, 2)
-            vel = round(np.linalg.norm(v_arr), 4)
-            writer.writerow([t.isoformat(), lat, lon, alt, vel])
-
-    output.seek(0)
     filename = f"bellatrix_{name.replace(' ', '_')}_{norad_id}.csv"
-    return StreamingResponse(
-        iter([output.getvalue()]),
+    return PlainTextResponse(
+        content,
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 # --- PDF Export ---
-@app.get("/api/export/pdf/{norad_id}")
-@limiter.limit("5/minute")
-async def export_pdf(request: Request, norad_id: str):
-    """Export satellite risk report as a downloadable PDF."""
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet
-    except ImportError:
-        return JSONResponse(status_code=503, content={"error": "PDF export not available. Install reportlab."})
-
-    from celestial_engine import get_tle, calculate_orbital_elements
-    from sgp4.api import Satrec, jday
+# Rendered reports keyed by (norad_id, UTC minute); the report only shows minute resolution
+_PDF_CACHE = {}
+_PDF_CACHE_MAX = 256
 
-    if not norad_id or not norad_id.strip():
-        return JSONResponse(status_code=400, content={"error": "Invalid NORAD ID"})
-    
-    tle_data = get_tle(norad_id.strip())
-    if not tle_data:
-        return JSONResponse(status_code=404, content={"error": "Satellite not found"})
-
-    name, line1, line2 = tle_data
-    satellite = Satrec.twoline2rv(line1, line2)
-    now = datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc)
+def _build_pdf(norad_id: str, name: str, line1: str, line2: str, now: datetime.datetime) -> bytes:
+    """Renders the risk report for one satellite at `now` to PDF bytes."""
+    satellite = get_satrec(line1, line2)
     jd, fr = jday(now.year, now.month, now.day, now.hour, now.minute, now.second)
     e, r, v = satellite.sgp4(jd, fr)
 
     buf = io.BytesIO()
     doc = SimpleDocTemplate(buf, pagesize=A4)
-    styles = getSampleStyleSheet()
     story = []
 
-    story.append(Paragraph("🛰️ Bellatrix Orbital Risk Report", styles["Title"]))
+    story.append(Paragraph("🛰️ Bellatrix Orbital Risk Report", _STYLES["Title"]))
     story.append(Spacer(1, 12))
-    story.append(Paragraph(f"Satellite: <b>{name}</b> (NORAD ID: {norad_id})", styles["Normal"]))
-    story.append(Paragraph(f"Generated: {now.strftime('%Y-%m-%d %H:%M UTC')}", styles["Normal"]))
+    story.append(Paragraph(f"Satellite: <b>{name}</b> (NORAD ID: {norad_id})", _STYLES["Normal"]))
+    story.append(Paragraph(f"Generated: {now.strftime('%Y-%m-%d %H:%M UTC')}", _STYLES["Normal"]))
     story.append(Spacer(1, 20))
 
     if e == 0:
-        r_arr = np.array(r)
-        v_arr = np.array(v)
-        alt = round(np.linalg.norm(r_arr) - 6371.0, 1)
-        vel = round(np.linalg.norm(v_arr), 2)
+        rx, ry, rz = r
+        vx, vy, vz = v
+        alt = round(math.sqrt(rx * rx + ry * ry + rz * rz) - _EARTH_R_KM, 1)
+        vel = round(math.sqrt(vx * vx + vy * vy + vz * vz), 2)
         elements = calculate_orbital_elements(satellite)
 
         data = [
@@ -215,26 +308,42 @@ async def export_pdf(request: Request, norad_id: str):
             ["TLE Line 2", line2],
         ]
         table = Table(data, colWidths=[150, 320])
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0a0a1a")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f0f4ff")]),
-        ]))
+        table.setStyle(_TABLE_STYLE)
         story.append(table)
 
     story.append(Spacer(1, 20))
-    story.append(Paragraph("Data source: CelesTrak / NORAD. © 2026 Bellatrix Orbita Project.", styles["Normal"]))
+    story.append(Paragraph("Data source: CelesTrak / NORAD. © 2026 Bellatrix Orbita Project.", _STYLES["Normal"]))
 
     doc.build(story)
-    buf.seek(0)
+    return buf.getvalue()
+
+@app.get("/api/export/pdf/{norad_id}")
+async def export_pdf(request: Request, norad_id: str):
+    """Export satellite risk report as a downloadable PDF."""
+    if not _HAS_REPORTLAB:
+        return ORJSONResponse(status_code=503, content={"error": "PDF export not available. Install reportlab."})
+
+    if not norad_id or not norad_id.strip():
+        return ORJSONResponse(status_code=400, content={"error": "Invalid NORAD ID"})
+
+    now = datetime.datetime.now(timezone.utc)
     filename = f"bellatrix_report_{norad_id}.pdf"
-    return StreamingResponse(
-        buf,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    cache_key = (norad_id.strip(), now.replace(second=0, microsecond=0))
+    pdf = _PDF_CACHE.get(cache_key)
+    if pdf is not None:
+        return Response(content=pdf, media_type="application/pdf", headers=headers)
+    
+    tle_data = await run_in_threadpool(get_tle, norad_id.strip())
+    if not tle_data:
+        return ORJSONResponse(status_code=404, content={"error": "Satellite not found"})
+
+    name, line1, line2 = tle_data
+    pdf = await run_in_threadpool(_build_pdf, norad_id, name, line1, line2, now)
+    if len(_PDF_CACHE) >= _PDF_CACHE_MAX:
+        _PDF_CACHE.pop(next(iter(_PDF_CACHE)))
+    _PDF_CACHE[cache_key] = pdf
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
 
 @app.get("/")
 def read_root():
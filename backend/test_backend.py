@@ -13,6 +13,17 @@ from datetime import datetime, timezone
 sys.path.insert(0, os.path.dirname(__file__))
 
 
+@pytest.fixture(autouse=True)
+def clear_tle_memory_cache():
+    """Isolate tests from TLEs memoized by earlier get_tle calls."""
+    import celestial_engine
+    celestial_engine._TLE_MEM.clear()
+    celestial_engine._REFRESH_ATTEMPTS.clear()
+    yield
+    celestial_engine._TLE_MEM.clear()
+    celestial_engine._REFRESH_ATTEMPTS.clear()
+
+
 # =============================================
 # Tests for celestial_engine
 # =============================================
@@ -36,6 +47,25 @@ class TestTLECache:
         loaded = _load_cache()
         assert loaded == data
 
+    def test_load_cache_empty_file(self, tmp_path, monkeypatch):
+        """Should return empty dict for a zero-byte cache file."""
+        cache_path = tmp_path / "tle_cache.json"
+        cache_path.write_bytes(b"")
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", str(cache_path))
+        from celestial_engine import _load_cache
+        assert _load_cache() == {}
+
+    def test_load_cache_sees_external_rewrite(self, tmp_path, monkeypatch):
+        """Reused parse should be invalidated when the file is rewritten."""
+        cache_path = tmp_path / "tle_cache.json"
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", str(cache_path))
+        from celestial_engine import _load_cache
+        cache_path.write_text(json.dumps({"1": {"name": "A", "line1": "", "line2": ""}}))
+        assert set(_load_cache()) == {"1"}
+        cache_path.write_text(json.dumps({"2": {"name": "B", "line1": "", "line2": ""}}))
+        os.utime(cache_path, ns=(0, 10**18))
+        assert set(_load_cache()) == {"2"}
+
     def test_load_cache_corrupt_file(self, tmp_path, monkeypatch):
         """Should return empty dict if cache file is corrupt JSON."""
         cache_path = tmp_path / "tle_cache.json"
@@ -52,31 +82,135 @@ class TestGetTLE:
         """Should return TLE tuple on successful fetch."""
         monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", str(tmp_path / "cache.json"))
         mock_response = MagicMock()
-        mock_response.text = "ISS (ZARYA)\n1 25544U 98067A   24001.00000000  .00001000  00000-0  10000-3 0  9999\n2 25544  51.6400 000.0000 0001000 000.0000 000.0000 15.50000000000000"
+        mock_response.text = "TEST SAT\n1 99990U 24001A   24001.00000000  .00001000  00000-0  10000-3 0  9999\n2 99990  51.6400 000.0000 0001000 000.0000 000.0000 15.50000000000000"
         mock_response.raise_for_status = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("celestial_engine._SESSION.get", return_value=mock_response):
             from celestial_engine import get_tle
-            result = get_tle(25544)
+            result = get_tle(99990)
 
         assert result is not None
         assert len(result) == 3
-        assert result[0] == "ISS (ZARYA)"
+        assert result[0] == "TEST SAT"
 
     def test_get_tle_fallback_to_cache(self, tmp_path, monkeypatch):
         """Should fall back to cache when network is unavailable."""
         import requests
         cache_path = str(tmp_path / "cache.json")
-        cache_data = {"25544": {"name": "ISS", "line1": "1 25544U", "line2": "2 25544U"}}
+        cache_data = {"99993": {"name": "OLD SAT", "line1": "1 99993U", "line2": "2 99993U"}}
         with open(cache_path, "w") as f:
             json.dump(cache_data, f)
         monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", cache_path)
 
-        with patch("requests.get", side_effect=requests.exceptions.ConnectionError("offline")):
+        with patch("celestial_engine._SESSION.get", side_effect=requests.exceptions.ConnectionError("offline")):
             from celestial_engine import get_tle
-            result = get_tle(25544)
+            result = get_tle(99993)
+
+        assert result == ("OLD SAT", "1 99993U", "2 99993U")
+
+    def test_get_tle_popular_skips_network(self, tmp_path, monkeypatch):
+        """Hardcoded popular sats should return immediately and refresh in the background."""
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", str(tmp_path / "cache.json"))
+        import celestial_engine
+
+        with patch("celestial_engine._SESSION.get") as mock_get, \
+             patch("celestial_engine.threading.Thread") as mock_thread:
+            first = celestial_engine.get_tle(25544)
+            second = celestial_engine.get_tle(25544)
+
+        assert first == second == celestial_engine.POPULAR_SATS_TLE["25544"]
+        mock_get.assert_not_called()
+        # One background refresh despite two lookups (cooldown)
+        mock_thread.assert_called_once_with(target=celestial_engine._fetch_tle, args=("25544",), daemon=True)
+
+    def test_get_tle_popular_prefers_stale_disk_entry(self, tmp_path, monkeypatch):
+        """An expired fetched TLE for a popular sat should win over the hardcoded one."""
+        cache_path = str(tmp_path / "cache.json")
+        cache_data = {"25544": {"name": "ISS (ZARYA)", "line1": "1 25544U NEW", "line2": "2 25544 NEW", "fetched_at": 0}}
+        with open(cache_path, "w") as f:
+            json.dump(cache_data, f)
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", cache_path)
+        import celestial_engine
+
+        with patch("celestial_engine._SESSION.get") as mock_get, \
+             patch("celestial_engine.threading.Thread") as mock_thread:
+            result = celestial_engine.get_tle(25544)
+
+        assert result == ("ISS (ZARYA)", "1 25544U NEW", "2 25544 NEW")
+        mock_get.assert_not_called()
+        mock_thread.assert_called_once()
+
+    def test_get_tle_memory_cache_hit(self, tmp_path, monkeypatch):
+        """Repeat lookups should be served from memory without touching the network."""
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", str(tmp_path / "cache.json"))
+        mock_response = MagicMock()
+        mock_response.text = "TEST SAT\n1 99991U 24001A   24001.00000000  .00001000  00000-0  10000-3 0  9999\n2 99991  51.6400 000.0000 0001000 000.0000 000.0000 15.50000000000000"
+        mock_response.raise_for_status = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+
+        with patch("celestial_engine._SESSION.get", return_value=mock_response) as mock_get:
+            from celestial_engine import get_tle
+            first = get_tle(99991)
+            second = get_tle("99991")
+
+        assert first == second
+        assert first[0] == "TEST SAT"
+        assert mock_get.call_count == 1
+
+    def test_get_tle_fresh_disk_entry_skips_network(self, tmp_path, monkeypatch):
+        """A recently fetched disk-cache entry should be used without a network call."""
+        import time
+        cache_path = str(tmp_path / "cache.json")
+        cache_data = {"99992": {"name": "DISK SAT", "line1": "1 99992U", "line2": "2 99992U", "fetched_at": int(time.time())}}
+        with open(cache_path, "w") as f:
+            json.dump(cache_data, f)
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", cache_path)
+
+        with patch("celestial_engine._SESSION.get") as mock_get:
+            from celestial_engine import get_tle
+            result = get_tle(99992)
+
+        assert result == ("DISK SAT", "1 99992U", "2 99992U")
+        mock_get.assert_not_called()
+
+    def test_get_tle_disk_hit_keeps_original_age(self, tmp_path, monkeypatch):
+        """A disk entry promoted to memory should expire TLE_TTL after it was fetched, not later."""
+        import time
+        import celestial_engine
+        cache_path = str(tmp_path / "cache.json")
+        fetched_at = int(time.time()) - (celestial_engine.TLE_TTL - 60)
+        cache_data = {"99995": {"name": "OLD DISK SAT", "line1": "1 99995U", "line2": "2 99995U", "fetched_at": fetched_at}}
+        with open(cache_path, "w") as f:
+            json.dump(cache_data, f)
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", cache_path)
 
-        assert result == ("ISS", "1 25544U", "2 25544U")
+        assert celestial_engine.get_tle(99995) == ("OLD DISK SAT", "1 99995U", "2 99995U")
+        stored_at, _ = celestial_engine._TLE_MEM["99995"]
+        assert time.monotonic() - stored_at == pytest.approx(celestial_engine.TLE_TTL - 60, abs=5)
+
+    def test_get_tle_not_modified_uses_cached_entry(self, tmp_path, monkeypatch):
+        """A stale entry should be revalidated with its ETag and reused on 304."""
+        cache_path = str(tmp_path / "cache.json")
+        cache_data = {"99994": {"name": "ETAG SAT", "line1": "1 99994U", "line2": "2 99994U",
+                                "fetched_at": 0, "etag": '"abc"', "last_modified": None}}
+        with open(cache_path, "w") as f:
+            json.dump(cache_data, f)
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", cache_path)
+        mock_response = MagicMock()
+        mock_response.status_code = 304
+
+        with patch("celestial_engine._SESSION.get", return_value=mock_response) as mock_get:
+            from celestial_engine import get_tle, _load_cache
+            result = get_tle(99994)
+
+        assert result == ("ETAG SAT", "1 99994U", "2 99994U")
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+        entry = _load_cache()["99994"]
+        assert entry["fetched_at"] > 0
+        assert entry["etag"] == '"abc"'
 
     def test_get_tle_not_found(self, tmp_path, monkeypatch):
         """Should return None when satellite not found and no cache."""
@@ -84,14 +218,55 @@ class TestGetTLE:
         mock_response = MagicMock()
         mock_response.text = ""  # Empty response
         mock_response.raise_for_status = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("celestial_engine._SESSION.get", return_value=mock_response):
             from celestial_engine import get_tle
             result = get_tle(99999999)
 
         assert result is None
 
 
+class TestSearch:
+    """Test CelesTrak search result projection."""
+
+    def test_search_projects_first_five(self):
+        """Should keep at most 5 results with a NORAD ID and fill defaults."""
+        import asyncio
+        import celestial_engine
+
+        items = [{"OBJECT_NAME": f"SAT {i}", "NORAD_CAT_ID": 1000 + i, "OBJECT_TYPE": "DEBRIS"} for i in range(7)]
+        items[1] = {"NORAD_CAT_ID": 1001}
+        items[2]["NORAD_CAT_ID"] = None
+        del items[3]["OBJECT_TYPE"]  # CelesTrak GP JSON omits OBJECT_TYPE
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(items).encode()
+
+        with patch("celestial_engine._SESSION.get", return_value=mock_response):
+            results = asyncio.run(celestial_engine.search_satellites("SAT"))
+
+        assert [r["norad_id"] for r in results] == [1000, 1001, 1003, 1004]
+        assert results[1] == {"name": "Unknown", "norad_id": 1001, "type": "PAYLOAD"}
+        assert results[2] == {"name": "SAT 3", "norad_id": 1003, "type": "PAYLOAD"}
+
+    def test_search_gp_json_without_object_type(self):
+        """A real-shaped GP record (no OBJECT_TYPE) should still produce a result."""
+        import asyncio
+        import celestial_engine
+
+        items = [{"OBJECT_NAME": "ISS (ZARYA)", "OBJECT_ID": "1998-067A", "NORAD_CAT_ID": 25544}]
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(items).encode()
+
+        with patch("celestial_engine._SESSION.get", return_value=mock_response):
+            results = asyncio.run(celestial_engine.search_satellites("25544"))
+
+        assert results == [{"name": "ISS (ZARYA)", "norad_id": 25544, "type": "PAYLOAD"}]
+
+
 class TestOrbitalElements:
     """Test orbital element calculations."""
 
@@ -113,6 +288,140 @@ class TestOrbitalElements:
         # ISS inclination should be ~51.6 degrees
         assert 50 < elements["inclination_deg"] < 53
 
+    def test_get_satrec_is_memoized(self):
+        """Same TLE lines should return the same parsed Satrec instance."""
+        from celestial_engine import POPULAR_SATS_TLE, get_satrec
+
+        _, line1, line2 = POPULAR_SATS_TLE["25544"]
+        assert get_satrec(line1, line2) is get_satrec(line1, line2)
+        assert get_satrec(line1, line2).satnum == 25544
+
+    def test_details_math_simple_state_vector(self):
+        """Scalar details kernel on an equatorial state vector at 00:00 UTC."""
+        from celestial_engine import _details_math
+
+        alt, vel, apogee, perigee, lat, lon = _details_math(
+            (7000.0, 0.0, 0.0), (0.0, 3.0, 4.0), 0.0011, 0.01, 0, 0)
+        assert alt == pytest.approx(629.0)
+        assert vel == pytest.approx(5.0)
+        assert apogee > perigee
+        assert lat == pytest.approx(0.0)
+        assert lon == pytest.approx(0.0)
+
+    def test_score_risk_leo_and_polar(self):
+        """Risk kernel should flag crowded LEO and polar orbits."""
+        from sgp4.api import Satrec
+        from celestial_engine import POPULAR_SATS_TLE, _score_risk
+
+        iss = Satrec.twoline2rv(*POPULAR_SATS_TLE["25544"][1:])
+        sentinel = Satrec.twoline2rv(*POPULAR_SATS_TLE["39634"][1:])
+        goes = Satrec.twoline2rv(*POPULAR_SATS_TLE["41866"][1:])
+
+        assert _score_risk(iss.inclo, iss.no_kozai) == (40, True, False)
+        assert _score_risk(sentinel.inclo, sentinel.no_kozai) == (70, True, True)
+        assert _score_risk(goes.inclo, goes.no_kozai) == (0, False, False)
+
+
+class TestPropagation:
+    """Test vectorized orbit propagation."""
+
+    def test_propagate_matches_scalar_sgp4(self, monkeypatch):
+        """Each trajectory point should match a scalar SGP4 call at its timestamp."""
+        import asyncio
+        import numpy as np
+        from sgp4.api import Satrec
+        import celestial_engine
+
+        tle = celestial_engine.POPULAR_SATS_TLE["25544"]
+        monkeypatch.setattr("celestial_engine.get_tle", lambda norad_id: tle)
+        result = json.loads(asyncio.run(celestial_engine.propagate_orbit("25544", minutes=90, steps=30)).body)
+
+        trajectory = result["trajectory"]
+        assert len(trajectory) == 30
+        sat = Satrec.twoline2rv(tle[1], tle[2])
+        for point in trajectory[::7]:
+            t = datetime.fromisoformat(point["time"])
+            jd, fr = celestial_engine._jday_grid(t, np.array([0.0]))
+            _, r, _ = sat.sgp4(jd[0], fr[0])
+            assert point["x"] == pytest.approx(r[0], abs=1e-3)
+            assert point["z"] == pytest.approx(r[2], abs=1e-3)
+            assert -90 <= point["lat"] <= 90
+            assert -180 <= point["lon"] < 180
+
+    def test_propagate_many_columnar(self, monkeypatch):
+        """Batch endpoint should return one row per satellite, one column per step."""
+        import asyncio
+        import numpy as np
+        from sgp4.api import Satrec
+        import celestial_engine
+
+        monkeypatch.setattr("celestial_engine.get_tle", lambda norad_id: celestial_engine.POPULAR_SATS_TLE.get(str(norad_id)))
+        result = json.loads(asyncio.run(celestial_engine.propagate_many(["25544", "20580", "41866"], minutes=60, steps=12)).body)
+
+        assert result["ids"] == ["25544", "20580", "41866"]
+        assert len(result["time"]) == 12
+        for key in ("x", "y", "z", "lat", "lon"):
+            assert len(result[key]) == 3
+            assert all(len(row) == 12 for row in result[key])
+        tle = celestial_engine.POPULAR_SATS_TLE["20580"]
+        jd, fr = celestial_engine._jday_grid(datetime.fromisoformat(result["time"][0]), np.array([0.0]))
+        _, r, _ = Satrec.twoline2rv(tle[1], tle[2]).sgp4(jd[0], fr[0])
+        assert result["x"][1][0] == pytest.approx(r[0], abs=1e-3)
+
+    def test_propagate_many_unknown_id(self, monkeypatch):
+        """Unknown IDs in the batch should produce a 404."""
+        import asyncio
+        from fastapi import HTTPException
+        import celestial_engine
+
+        monkeypatch.setattr("celestial_engine.get_tle", lambda norad_id: celestial_engine.POPULAR_SATS_TLE.get(str(norad_id)))
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(celestial_engine.propagate_many(["25544", "99999999"], minutes=90, steps=10))
+        assert exc_info.value.status_code == 404
+
+    def test_propagate_many_validates_inputs(self):
+        """Zero steps and oversized batches should be rejected before any work."""
+        from fastapi.testclient import TestClient
+        from main import app
+        import celestial_engine
+
+        client = TestClient(app)
+        assert client.get("/api/propagate_many?ids=25544&steps=0").status_code == 422
+        too_many = "&".join(f"ids={i}" for i in range(celestial_engine.MAX_BATCH_IDS + 1))
+        with patch("celestial_engine.get_tle") as mock_get_tle:
+            response = client.get(f"/api/propagate_many?{too_many}")
+        assert response.status_code == 400
+        mock_get_tle.assert_not_called()
+
+
+class TestConjunction:
+    """Test vectorized close-approach screening."""
+
+    def test_conjunction_matches_scalar_loop(self, monkeypatch):
+        """Batched SGP4 grid should find the same closest approach as a per-step loop."""
+        import asyncio
+        import numpy as np
+        from sgp4.api import Satrec
+        import celestial_engine
+
+        tles = {
+            "25544": celestial_engine.POPULAR_SATS_TLE["25544"],
+            "25148": celestial_engine.POPULAR_SATS_TLE["25148"],
+        }
+        monkeypatch.setattr("celestial_engine.get_tle", lambda norad_id: tles.get(str(norad_id)))
+        result = asyncio.run(celestial_engine.check_conjunction("25544", "25148"))
+
+        sat1 = Satrec.twoline2rv(tles["25544"][1], tles["25544"][2])
+        sat2 = Satrec.twoline2rv(tles["25148"][1], tles["25148"][2])
+        start = datetime.fromisoformat(result["time_of_closest_approach"])
+        jd, fr = celestial_engine._jday_grid(start, np.array([0.0]))
+        _, r1, _ = sat1.sgp4(jd[0], fr[0])
+        _, r2, _ = sat2.sgp4(jd[0], fr[0])
+
+        assert result["time_of_closest_approach"] is not None
+        assert result["min_distance_km"] == pytest.approx(np.linalg.norm(np.subtract(r1, r2)), abs=0.01)
+        assert result["risk_level"] in ["LOW", "MEDIUM", "HIGH"]
+
 
 class TestDashboardData:
     """Test mock dashboard data."""
@@ -153,6 +462,15 @@ class TestAnalyticsEngine:
         # Should have some data structure
         assert result is not None
 
+    def test_generate_risk_trend_is_deterministic(self):
+        """Same NORAD ID should always produce the same trend, one point per day."""
+        from analytics_engine import generate_risk_trend
+        first = generate_risk_trend("25544", days=10)
+        second = generate_risk_trend("25544", days=10)
+        assert len(first.trend_data) == 10
+        assert [p.risk_score for p in first.trend_data] == [p.risk_score for p in second.trend_data]
+        assert all(0 <= p.risk_score <= 100 for p in first.trend_data)
+
     def test_get_global_stats_returns_dict(self):
         from analytics_engine import get_global_stats
         result = get_global_stats()
@@ -167,7 +485,10 @@ class TestAPIEndpoints:
     """Test FastAPI endpoints using TestClient."""
 
     @pytest.fixture
-    def client(self):
+    def client(self, tmp_path, monkeypatch):
+        # Keep the tracked tle_cache.json untouched and CelesTrak unreached
+        monkeypatch.setattr("celestial_engine.TLE_CACHE_FILE", str(tmp_path / "tle_cache.json"))
+        monkeypatch.setattr("celestial_engine._schedule_refresh", lambda norad_id: None)
         try:
             from fastapi.testclient import TestClient
             from main import app
@@ -228,12 +549,100 @@ class TestAPIEndpoints:
         assert response.status_code == 200
         assert isinstance(response.json(), dict)
 
+    def test_export_csv_endpoint(self, client):
+        """CSV export should return a header plus one row per 2-minute sample."""
+        response = client.get("/api/export/csv/25544")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        rows = response.text.strip().splitlines()
+        assert rows[0] == "timestamp,latitude,longitude,altitude_km,velocity_kms"
+        assert len(rows) == 46
+        timestamp, lat, lon, alt, vel = rows[1].split(",")
+        assert -90 <= float(lat) <= 90
+        assert -180 <= float(lon) < 180
+        assert float(vel) > 0
+
+    def test_export_pdf_cached_per_minute(self, client):
+        """Repeat PDF exports within a minute should be served from the byte cache."""
+        import main
+        if not main._HAS_REPORTLAB:
+            pytest.skip("reportlab not installed")
+        main._PDF_CACHE.clear()
+        frozen = MagicMock(wraps=main.datetime)
+        frozen.datetime.now.return_value = datetime(2026, 3, 1, 12, 0, 59, tzinfo=timezone.utc)
+        with patch("main.datetime", frozen):
+            first = client.get("/api/export/pdf/25544")
+            assert first.status_code == 200
+            assert first.headers["content-type"] == "application/pdf"
+            assert first.content.startswith(b"%PDF")
+            with patch("main.SimpleDocTemplate") as mock_doc:
+                second = client.get("/api/export/pdf/25544")
+                padded = client.get("/api/export/pdf/%2025544")
+        mock_doc.assert_not_called()
+        assert second.content == first.content
+        assert padded.content == first.content
+        assert len(main._PDF_CACHE) == 1
+        main._PDF_CACHE.clear()
+
+    def test_analytics_conditional_get(self, client):
+        """Analytics should carry a weak ETag and answer 304 when it still matches."""
+        first = client.get("/api/analytics/25544")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+        assert "max-age" in first.headers["cache-control"]
+
+        second = client.get("/api/analytics/25544", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+        other = client.get("/api/analytics/25544", headers={"If-None-Match": 'W/"0000"'})
+        assert other.status_code == 200
+        assert other.json() == first.json()
+
+    def test_health_and_stats_cache_headers_without_etag(self, client):
+        """Timestamped endpoints should get Cache-Control only, and other routes nothing."""
+        health = client.get("/api/health")
+        assert health.headers["cache-control"] == "no-cache"
+        assert "etag" not in health.headers
+        stats = client.get("/api/stats")
+        assert stats.headers["cache-control"] == "public, max-age=30"
+        assert "etag" not in stats.headers
+        assert "cache-control" not in client.get("/api/satellites").headers
+
+    def test_rate_buckets_bounded_lru(self, monkeypatch):
+        """The bucket table should stay bounded by evicting the least recently seen key."""
+        import main
+        monkeypatch.setattr("main._RATE_MAX_BUCKETS", 3)
+        main._RATE_BUCKETS.clear()
+        for ip in ("a", "b", "c"):
+            main._take_token((ip, "/x"), 1.0, 5)
+        main._take_token(("a", "/x"), 1.0, 5)  # refresh a
+        main._take_token(("d", "/x"), 1.0, 5)
+        assert list(main._RATE_BUCKETS) == [("c", "/x"), ("a", "/x"), ("d", "/x")]
+        main._RATE_BUCKETS.clear()
+
     def test_rate_limiting_headers(self, client):
-        """Rate limit headers should be present in responses."""
+        """Unlimited endpoints should pass straight through the limiter."""
         response = client.get("/api/health")
-        # slowapi adds X-RateLimit headers
         assert response.status_code == 200
 
+    def test_rate_limit_returns_429_when_bucket_empty(self, client):
+        """Requests beyond a bucket's capacity should be rejected with Retry-After."""
+        import main
+        main._RATE_BUCKETS.clear()
+        _, capacity = main.RATE_LIMITS["/api/stats"]
+        for _ in range(capacity):
+            assert client.get("/api/stats").status_code == 200
+        response = client.get("/api/stats")
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        # Other prefixes keep their own bucket
+        assert client.get("/api/analytics/25544").status_code == 200
+        main._RATE_BUCKETS.clear()
+
 
 # =============================================
 # Run tests
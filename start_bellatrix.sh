@@ -11,10 +11,13 @@ lsof -ti :8083 | xargs kill -9 2>/dev/null
 lsof -ti :8084 | xargs kill -9 2>/dev/null
 
 # 2. Start Backend (Port 8000)
-echo "🛰️ Starting Backend (FastAPI) on port 8000..."
+# uvloop event loop + httptools parser. One worker by default: rate-limit buckets
+# live in each process, so N workers allow N x the per-IP limits (BELLATRIX_WORKERS)
+WORKERS=${BELLATRIX_WORKERS:-1}
+echo "🛰️ Starting Backend (FastAPI) on port 8000 with $WORKERS workers..."
 cd backend
 # Run in background & save PID
-python3 -m uvicorn main:app --host 0.0.0.0 --port 8000 > ../backend.log 2>&1 &
+python3 -m uvicorn main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --workers "$WORKERS" > ../backend.log 2>&1 &
 BACKEND_PID=$!
 cd ..
 